@@ -8,6 +8,10 @@ import itertools
 import copy
 
 import yaml
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
 
 import neronet.core
 import neronet.node
@@ -33,7 +37,7 @@ class FormatError(Exception):
 class ConfigParser():
     """ Configuration file parser for neronet configuration files
     """
-    def load_config(self, filename, default, check, *args):
+    def load_config(self, filename, default, check, loader, *args):
         """Loads the yaml file and checks its format
 
         Parameters:
@@ -42,6 +46,7 @@ class ConfigParser():
                 file doesn't exist
             check (function): function that checks that the format of the data
                 is correct
+            loader (class): yaml loader used to read the file
             args (list): extra arguments for the check function
         
         Returns:
@@ -58,7 +63,7 @@ class ConfigParser():
                                 filename), default)
             return default
         data = self.load_yaml(os.path.join(neronet.core.USER_DATA_DIR_ABS, \
-                            filename))
+                            filename), loader)
         check(data, *args)
         return data
 
@@ -76,7 +81,7 @@ class ConfigParser():
         """
         node_default = {'nodes': {}, 'groups': {}, 'default_node': None}
         return self.load_config(nodes_filename, node_default, 
-                                self.check_nodes)
+                                self.check_nodes, _Loader)
 
     def check_nodes(self, nodes_data):
         """Checks the format of the node data
@@ -130,8 +135,10 @@ class ConfigParser():
             dict: data of the database
         """
         database_default = {}
+        #The database holds dumped Experiment objects, which the safe
+        #loaders can't construct
         return self.load_config(database_filename, database_default, \
-                            self.check_database)
+                            self.check_database, yaml.Loader)
 
     def check_database(self, database_data):
         pass
@@ -179,10 +186,10 @@ class ConfigParser():
         self.write_yaml(os.path.join(neronet.core.USER_DATA_DIR_ABS, \
                         nodes_filename), nodes_data)
 
-    def load_yaml(self, filename):
+    def load_yaml(self, filename, loader=_Loader):
         """Loads yaml file"""
         with open(filename, 'r') as f:
-            data = yaml.load(f.read())
+            data = yaml.load(f, Loader=loader)
         if not data: data = {}
         return data
 
@@ -220,7 +227,7 @@ class ConfigParser():
             raise FormatError(['empty config file'])
         
         with open(config_file, 'r') as file:
-            data = yaml.load(file.read())
+            data = yaml.load(file, Loader=_Loader)
 
         return self.parse_experiment_data(folder, data)
         
@@ -250,8 +257,11 @@ class ConfigParser():
             def check_type(field, t):
                 """Checks that the field is certain type, horrid
                 """
-                types = {"string": str, "dict": dict, "list": list}
-                if not isinstance(data[field], types[t]):
+                types = {"string": str, "dict": dict, "list": list,
+                            "int": int}
+                #bool is a subclass of int but true isn't a number
+                if not isinstance(data[field], types[t]) or \
+                        (t == "int" and isinstance(data[field], bool)):
                     errors.append("%s: %s should be a %s" % \
                                     (exp_id, field, t))
                     return False
@@ -349,6 +359,29 @@ class ConfigParser():
                             errors.append("%s: could not parse module or "
                                     "function from output file processor "
                                     "arguments" % exp_id)
+            if 'output_line_processor_schema' in data:
+                if check_type('output_line_processor_schema', 'dict'):
+                    for output_file, schema in \
+                            data['output_line_processor_schema'].items():
+                        if 'output_line_processor' not in data or \
+                            output_file not in data['output_line_processor']:
+                            errors.append("%s: no output line processor "
+                                    "defined for output line processor "
+                                    "schema of %s" % (exp_id, output_file))
+                        try:
+                            if not isinstance(schema, str):
+                                raise ValueError(schema)
+                            neronet.experiment.parse_schema(schema)
+                        except ValueError:
+                            errors.append("%s: could not parse column names "
+                                    "and separator from output line "
+                                    "processor schema of %s" % \
+                                    (exp_id, output_file))
+            if 'output_line_processor_block_size' in data:
+                if check_type('output_line_processor_block_size', 'int') \
+                    and data['output_line_processor_block_size'] <= 0:
+                    errors.append("%s: output line processor block size "
+                                    "should be positive" % exp_id)
                     
             if 'plot' in data:
                 check_type('plot', 'dict')
@@ -474,8 +507,8 @@ class ConfigParser():
                                             str(param[key]) for key in keys]
                             name = '_'.join([experiment_id] + param_strings)
                             experiment_data['experiment_id'] = name
-                        experiments.append( \
-                            neronet.experiment.Experiment(**experiment_data))
+                        experiments.append(neronet.experiment.Experiment. \
+                                            from_yaml_mapping(experiment_data))
                 _process_data(experiment_scope) 
         _process_data(data)
  
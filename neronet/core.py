@@ -111,7 +111,7 @@ def import_from(module_name, obj_name):
         module = importlib.import_module("neronet.scripts." + module_name)
         obj = getattr(module, obj_name)
         return obj
-    except:
+    except Exception:
         raise ImportError("Something went wrong while trying to "
                         "import %s from %s:\n" % (obj_name, module_name) + \
                             traceback.format_exc())
@@ -130,7 +130,7 @@ def can_import(module_name, obj_name):
     try:
         module = importlib.import_module("neronet.scripts." + module_name)
         obj = getattr(module, obj_name)
-    except:
+    except Exception:
         return False
     return True
 
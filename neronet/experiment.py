@@ -1,26 +1,62 @@
 # -*- coding: utf-8 -*-
 
+import collections
 import datetime
+import operator
 import os
-import shlex
 import time
 import traceback
+try:
+    from sys import intern
+except ImportError:
+    #Python 2 has intern as a builtin
+    pass
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-import neronet.core
+#neronet.core and shlex are imported on first use to keep importing the
+#experiment module light
 
 MANDATORY_FIELDS = set(['run_command_prefix', 'main_code_file'])
 """Set: Experiment fields required in every config.yaml"""
 
 OPTIONAL_FIELDS = set(['parameters', 'parameters_format', 'outputs', 
                         'output_line_processor', 'output_file_processor', 
-                        'plot', 'collection', 'required_files', 'conditions', 
+                        'output_line_processor_schema',
+                        'output_line_processor_block_size', 'plot',
+                        'collection', 'required_files', 'conditions', 
                         'sbatch_args', 'custom_msg'])
 """Set: Fields that Neronet uses but are not necessary"""
 
 AUTOMATIC_FIELDS = set(['path', 'time_created', 'time_modified', 
-                        'states_info', 'node_id', 'warnings'])
+                        'state_names', 'state_times', 'node_id',
+                        'warnings'])
 """Set: Contains all fields automatically generated by Neronet"""
 
+_OUTPUT_BUFFER_SIZE = 1 << 20
+"""Int: Buffer size in bytes used when reading output files"""
+
+_COMPARATORS = {'gt': operator.gt, 'lt': operator.lt, 'eq': operator.eq,
+                'geq': operator.ge, 'leq': operator.le}
+"""Dict: Comparison functions of the experiment warning comparators"""
+
+_CONDITION_FORMAT = ('    %s:\n'
+                    '      variablename: %s\n'
+                    '      killvalue: %s\n'
+                    '      comparator: %s\n'
+                    '      when: %s\n'
+                    '      action: %s\n')
+"""Str: Format of a condition in the experiment status"""
+
+_PROCESSOR_CACHE = {}
+"""Dict: Parsed processor specs as spec string -> (name, function, args)"""
+
+_SCHEMA_CACHE = {}
+"""Dict: Parsed line processor schemas as schema string -> (names, delimiter)"""
+
 class OutputReadError(Exception):
     """ Exception raised when output reading failed
     """
@@ -30,6 +66,84 @@ class PlotError(Exception):
     """ Exception raised when ploting failed
     """
 
+def _parse_processor(spec):
+    """Parses an output processor or plotter spec and imports its function
+
+    The result is cached by the spec string so that each spec is split and
+    imported only once.
+
+    Parameters:
+        spec (str): The spec in the format "module function [arguments]"
+
+    Returns:
+        tuple: The function name, the function and the rest of the arguments
+
+    Raises:
+        ValueError: if the spec doesn't contain a module and a function name
+        ImportError: if importing the function fails
+    """
+    if spec not in _PROCESSOR_CACHE:
+        import shlex
+        from neronet.core import import_from
+        args = shlex.split(spec)
+        if len(args) < 2:
+            raise ValueError("no module and function in '%s'" % spec)
+        module_name, function_name = args[0], args[1]
+        function = import_from(module_name, function_name)
+        _PROCESSOR_CACHE[spec] = (function_name, function, tuple(args[2:]))
+    return _PROCESSOR_CACHE[spec]
+
+def parse_schema(schema):
+    """Parses an output line processor schema
+
+    The result is cached by the schema string so that each schema is split
+    only once.
+
+    Parameters:
+        schema (str): The schema in the format '"names" ["separator"]'
+
+    Returns:
+        tuple: The column names and the separator, '' for whitespace
+
+    Raises:
+        ValueError: if the schema doesn't contain any column names or its
+        separator isn't made of punctuation
+    """
+    if schema not in _SCHEMA_CACHE:
+        import shlex
+        args = shlex.split(schema)
+        if not args or not args[0].split():
+            raise ValueError("no column names in '%s'" % schema)
+        delimiter = args[1].strip() if len(args) > 1 else ''
+        #A word as the separator means the names weren't quoted
+        if len(args) > 2 or any(c.isalnum() for c in delimiter):
+            raise ValueError("invalid separator in '%s'" % schema)
+        _SCHEMA_CACHE[schema] = (tuple(args[0].split()), delimiter)
+    return _SCHEMA_CACHE[schema]
+
+def _iter_lines(output_file, block_size):
+    """Yields the lines of a file by reading it in blocks
+
+    Parameters:
+        output_file (file object): The file to be read
+        block_size (int): How many characters to read at a time
+
+    Yields:
+        str: A line of the file including its line ending
+    """
+    rest = ''
+    while True:
+        block = output_file.read(block_size)
+        if not block:
+            break
+        lines = (rest + block).split('\n')
+        #The last piece of the block can be the start of the next line
+        rest = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    if rest:
+        yield rest
+
 class Experiment(object):
     """ 
     Attributes:
@@ -41,30 +155,46 @@ class Experiment(object):
         parameters_format (str): The format of the experiment parameters
         collection (str): The collection the experiment is part of
         conditions (dict): Special condition for the experiment to do stuff
-        state (list of tuples): The states of the experiment with timestamp
+        state (str): The current state of the experiment
+        state_names (list): The states of the experiment in order
+        state_times (list): Timestamps of the states in state_names
         node_id (str): The ID of the node where the experiment is run
         time_created (datetime): Timestamp of when the experiment was created
         time_modified (datetime): Timestamp of when the experiment was modified
             last
         path (str): Path to the experiment folder
+
+    Values derived from the fields, like the callstring, are cached and the
+    caches are cleared when a field is assigned. Fields must therefore be
+    changed by assigning a new value, f.ex. a modified copy of parameters,
+    instead of modifying the value in place.
     """
 
     class State:
+        """The states are interned so that they can be compared by identity
+        """
         #none = 'none'
-        defined = 'defined'
-        submitted = 'submitted'
-        submitted_to_kid = 'submitted_to_kid'
-        lost = 'lost'
-        terminated = 'terminated'
-        running = 'running'
-        finished = 'finished'
+        defined = intern('defined')
+        submitted = intern('submitted')
+        submitted_to_kid = intern('submitted_to_kid')
+        lost = intern('lost')
+        terminated = intern('terminated')
+        running = intern('running')
+        finished = intern('finished')
+
+    #The fields live in _fields, the slots hold the internal attributes
+    __slots__ = ('_fields', '_experiment_id', '_current_state',
+                    '_cond_by_prefix', '_parameters_cache', '_callstring_cache',
+                    '_processable_cache', '_output_cache')
 
     def __init__(self, experiment_id, run_command_prefix, main_code_file,
                     path, parameters=None, parameters_format="", 
                     required_files=None, outputs=None, 
                     output_line_processor=None, output_file_processor=None, 
-                    collection=None, custom_msg=None, plot=None, 
-                    conditions=None, sbatch_args=None):
+                    output_line_processor_schema=None,
+                    output_line_processor_block_size=None, collection=None,
+                    custom_msg=None, plot=None, conditions=None,
+                    sbatch_args=None):
         now = datetime.datetime.now()
         fields = {'run_command_prefix': run_command_prefix,
                     'main_code_file': main_code_file,
@@ -72,6 +202,10 @@ class Experiment(object):
                     'outputs': outputs,
                     'output_file_processor': output_file_processor,
                     'output_line_processor': output_line_processor,
+                    'output_line_processor_schema': \
+                                        output_line_processor_schema,
+                    'output_line_processor_block_size': \
+                                        output_line_processor_block_size,
                     'plot': plot,
                     'parameters': parameters,
                     'parameters_format': parameters_format,
@@ -83,59 +217,114 @@ class Experiment(object):
                     'time_created': now,
                     'time_modified': now,
                     'run_results': [],
-                    'states_info': [(Experiment.State.defined, now)],
+                    'state_names': [State.defined],
+                    'state_times': [now],
                     'node_id': None,
                     'warnings' : [],
                     'custom_msg': custom_msg if custom_msg else "" }
         #MAGIC: Creates the attributes for the experiment class
-        self.__dict__['_fields'] = fields
-        #super(Experiment, self).__setattr__('_fields', fields)
+        super(Experiment, self).__setattr__('_fields', fields)
         super(Experiment, self).__setattr__('_experiment_id', experiment_id)
+        super(Experiment, self).__setattr__('_current_state', State.defined)
+        self._reset_caches()
+
+    @classmethod
+    def from_yaml_mapping(cls, mapping):
+        """Creates an experiment from an already parsed config.yaml mapping
+
+        Parameters:
+            mapping (dict): The experiment fields with experiment_id and path
+
+        Returns:
+            Experiment: The experiment defined by the mapping
+        """
+        return cls(**mapping)
+
+    def _clone_with_id(self, experiment_id):
+        """Returns a copy of the experiment definition with a new id
+
+        The user defined fields are shared with the original experiment and
+        the automatic fields start over, without running __init__ again.
+        """
+        now = datetime.datetime.now()
+        fields = dict(self._fields)
+        fields.pop('log_output', None)
+        fields.update({'time_created': now,
+                        'time_modified': now,
+                        'run_results': [],
+                        'state_names': [State.defined],
+                        'state_times': [now],
+                        'node_id': None,
+                        'warnings': []})
+        clone = Experiment.__new__(Experiment)
+        super(Experiment, clone).__setattr__('_fields', fields)
+        super(Experiment, clone).__setattr__('_experiment_id', experiment_id)
+        super(Experiment, clone).__setattr__('_current_state', State.defined)
+        clone._reset_caches()
+        return clone
+
+    def _reset_caches(self):
+        """Empties the values cached from the experiment fields"""
+        #Conditions grouped by variable name, built on first get_action
+        super(Experiment, self).__setattr__('_cond_by_prefix', None)
+        super(Experiment, self).__setattr__('_parameters_cache', None)
+        super(Experiment, self).__setattr__('_callstring_cache', None)
+        super(Experiment, self).__setattr__('_processable_cache', None)
+        #Read outputs as path -> ((mtime, size), data)
+        super(Experiment, self).__setattr__('_output_cache', {})
         
     def get_results_dir(self):
         """Returns the location of the directory of the latest experiment results
         """
-        root = neronet.core.USER_DATA_DIR_ABS
-        if self.state == Experiment.State.finished:
+        if self._current_state is State.finished:
             return self.run_results[-1]
-        return os.path.join(root, 'results', self.id)
+        from neronet.core import USER_DATA_DIR_ABS
+        return os.path.join(USER_DATA_DIR_ABS, 'results', self.id)
 
     def get_output(self, filename):
         """Returns the output data of the output file as a dict
 
+        The data is cached and read again only when the modification time
+        or the size of the output file changes.
+
         Returns:
-            dict: The output file as a dictionary
+            dict: The output file as a dictionary. The dict is shared with the
+            cache, so it must not be modified.
 
         Raises:
             OutputReadError: When reading of the output failed
             ImportError: when importing the user defined output reading
             function fails
         """
+        fields = self._fields
         data = None
+        #Gets the location of the results folder. 
+        #Changes when the experiment has finnished
+        path = os.path.join(self.get_results_dir(), filename)
+        try:
+            stat = os.stat(path)
+            signature = (stat.st_mtime, stat.st_size)
+        except OSError:
+            signature = None
+        cached = self._output_cache.get(path)
+        if signature and cached and cached[0] == signature:
+            return cached[1]
         #Checks which output reader type is specified for the file type
         #Prefers processor that read the whole file
         for processor_type in ['output_file_processor',
                                 'output_line_processor']:
-            if not self._fields[processor_type] or \
-                filename not in self._fields[processor_type]:
+            if not fields[processor_type] or \
+                filename not in fields[processor_type]:
                 continue
             #Constructs the output reader and arguments
-            args = \
-                shlex.split(self._fields[processor_type][filename])
             try:
-                module_name = args[0]
-                reader_name = args[1]
-                reader_args = args[2:]
-            except:
+                reader_name, reader, reader_args = \
+                    _parse_processor(fields[processor_type][filename])
+            except ValueError:
                 raise OutputReadError("%s: couldn't parse %s arguments" % \
                                         (self.id, processor_type))
-            reader = neronet.core.import_from(module_name, reader_name)
-            #Gets the location of the results folder. 
-            #Changes when the experiment has finnished
-            results_dir = self.get_results_dir()
-            
             #Opens the output file and processes the output data
-            with open(os.path.join(results_dir, filename), 'r') as f:
+            with open(path, 'r', _OUTPUT_BUFFER_SIZE) as f:
                 if processor_type == 'output_file_processor':
                     try:
                         data = reader(f, *reader_args)
@@ -146,29 +335,89 @@ class Experiment(object):
                     if not isinstance(data, dict):
                         raise OutputReadError("%s: %s for %s didn't return a"
                                 "dict" % (self.id, processor_type, filename))
+                elif numpy and fields['output_line_processor_schema'] \
+                        and filename in \
+                        fields['output_line_processor_schema']:
+                    #The schema lets numpy parse the columns in one go
+                    data = self._read_output_columns(f, filename)
                 else:
-                    data = {}
-                    for line in f:
+                    columns = collections.defaultdict(list)
+                    block_size = fields['output_line_processor_block_size']
+                    lines = _iter_lines(f, block_size) if block_size else f
+                    for line in lines:
                         try:
                             line_data = reader(line, *reader_args)
                         except:
                             raise OutputReadError("%s: couldn't read %s "
                                 "with %s:\n" % (self.id, filename, reader_name) \
                                 + traceback.format_exc())
-                        if not isinstance(data, dict):
+                        if not isinstance(line_data, dict):
                             raise OutputReadError("%s: %s for %s didn't "
                                                     "return a dict" \
                                         % (self.id, processor_type, filename))
-                        for key, value in line_data.iteritems():
-                            if key not in data:
-                                data[key] = [value]
-                            else:
-                                data[key].append(value)
+                        for key, value in line_data.items():
+                            columns[key].append(value)
+                    data = dict(columns)
         if not data:
             raise OutputReadError("%s: no output processor defined for %s" \
                                 % (self.id, filename))
+        if signature:
+            self._output_cache[path] = (signature, data)
         return data
 
+    def _read_output_columns(self, output_file, filename):
+        """Reads a numeric output file as columns using its line processor
+        schema
+
+        Parameters:
+            output_file (file object): The opened output file
+            filename (str): Name of the output file
+
+        Returns:
+            dict: The column names mapped to numpy arrays of the column data
+
+        Raises:
+            OutputReadError: When the schema or the output couldn't be parsed
+        """
+        try:
+            names, delimiter = parse_schema(
+                    self._fields['output_line_processor_schema'][filename])
+        except ValueError:
+            raise OutputReadError("%s: couldn't parse output line processor "
+                                    "schema for %s" % (self.id, filename))
+        try:
+            columns = numpy.loadtxt(output_file, dtype=float, ndmin=2,
+                            delimiter=delimiter or None, comments=None,
+                            usecols=range(len(names)))
+        except (ValueError, IndexError):
+            raise OutputReadError("%s: couldn't read %s with schema %s\n" \
+                                    % (self.id, filename, ' '.join(names)) + \
+                                    traceback.format_exc())
+        return dict((name, columns[:, i]) for i, name in enumerate(names))
+
+    def _processable_outputs(self):
+        """Returns the outputs that have an output processor defined
+
+        The outputs are cached until the outputs or the output processors are
+        assigned.
+
+        Returns:
+            tuple: The processable output filenames in the order of outputs
+        """
+        if self._processable_cache is None:
+            fields = self._fields
+            processors = set()
+            for processor_type in ('output_file_processor',
+                                    'output_line_processor'):
+                if fields[processor_type]:
+                    processors.update(fields[processor_type])
+            processable = tuple(output_file for output_file in \
+                                    fields['outputs'] or () \
+                                    if output_file in processors)
+            super(Experiment, self).__setattr__('_processable_cache',
+                                                processable)
+        return self._processable_cache
+
     def plot_outputs(self):
         """Plots the experiment outputs according to the user specified
         plotting functions and output line parser
@@ -203,19 +452,19 @@ class Experiment(object):
             PlotError: When the plotting failed
             ImportError: When importing a user defined function fails.
         """
-        if plot_name not in self.plot:
+        plots = self._fields['plot']
+        if plot_name not in plots:
             raise PlotError("%s: no plot named %s defined" \
                                 % (self.id, plot_name))
         #Get the output data as dict from the output file
-        args = shlex.split(self.plot[plot_name])
         try:
-            module_name = args[0]
-            plotter_name = args[1]
-            output_filename = args[2]
-            plot_args = args[3:]
-        except:
+            plotter_name, plot_function, args = \
+                _parse_processor(plots[plot_name])
+        except ValueError:
             raise PlotError("%s: couldn't parse plot arguments" % self.id)
-        plot_function = neronet.core.import_from(module_name, plotter_name)
+        if not args:
+            raise PlotError("%s: no output file in plot arguments" % self.id)
+        output_filename, plot_args = args[0], args[1:]
         #Reads the output file using user defined output reading function
         output = self.get_output(output_filename)
 
@@ -234,17 +483,47 @@ class Experiment(object):
             raise PlotError("%s: couldn't plot %s:\n" % (self.id, plot_name) \
                             + traceback.format_exc())
 
+    def _build_condition_index(self):
+        """Groups the conditions by the first word of the variable they follow
+
+        Variable names can contain whitespace, so a log row is matched against
+        the conditions whose variable name starts with the first word of the
+        row.
+
+        Returns:
+            dict: First words of the variable names mapped to lists of
+            (name, condition) tuples
+        """
+        index = {}
+        conditions = self._fields['conditions']
+        if conditions:
+            for key, condition in conditions.items():
+                first_word = (condition.varname.split(None, 1) or [''])[0]
+                index.setdefault(first_word, []).append((key, condition))
+        super(Experiment, self).__setattr__('_cond_by_prefix', index)
+        return index
+
     def get_action(self, logrow):
+        """Checks the conditions that follow the variable of the log row
+
+        The log row is expected to be of the form 'VARIABLENAME VALUE'.
+
+        Returns:
+            tuple: The action and the name of the condition that caused it
+        """
         init_action = ('no action', '')
-        try:
-            for key in self._fields['conditions']:
-                action = self._fields['conditions'][key].get_action(logrow)
-                if action == 'kill':
-                    return (action, key)
-                elif action != 'no action':
-                    init_action = (action, key)
-        except TypeError:
+        index = self._cond_by_prefix
+        if index is None:
+            index = self._build_condition_index()
+        row_start = logrow.split(None, 1)
+        if not row_start:
             return init_action
+        for key, condition in index.get(row_start[0], ()):
+            action = condition.get_action(logrow)
+            if action == 'kill':
+                return (action, key)
+            elif action != 'no action':
+                init_action = (action, key)
         return init_action
        
     def set_warning(self, warning):
@@ -278,12 +557,6 @@ class Experiment(object):
         if attr in fields:
             return fields[attr]
         #Gets hidden attributes by adding _
-        if attr == 'id':
-            attr = 'experiment_id'
-        elif attr == 'state':
-            return fields['states_info'][-1][0]
-        elif attr == 'state_info':
-            return fields['states_info'][-1]
         return super(Experiment, self).__getattribute__('_' + attr)
 
     def __setattr__(self, attr, value):
@@ -298,110 +571,180 @@ class Experiment(object):
             super(Experiment, self).__setattr__('_experiment_id', value)
         elif attr in fields or attr in ('log_output', ):
             fields[attr] = value
+            if attr == 'conditions':
+                super(Experiment, self).__setattr__('_cond_by_prefix', None)
+            elif attr in ('parameters', 'parameters_format'):
+                super(Experiment, self).__setattr__('_parameters_cache', None)
+                super(Experiment, self).__setattr__('_callstring_cache', None)
+            elif attr in ('run_command_prefix', 'main_code_file'):
+                super(Experiment, self).__setattr__('_callstring_cache', None)
+            elif attr in ('output_line_processor', 'output_file_processor',
+                            'output_line_processor_schema'):
+                self._output_cache.clear()
+                super(Experiment, self).__setattr__('_processable_cache', None)
+            elif attr == 'outputs':
+                super(Experiment, self).__setattr__('_processable_cache', None)
         else:
             raise AttributeError('Experiment has no attribute named "%s"!' % attr)
 
+    def __getstate__(self):
+        """Returns the pickled state of the experiment without caches"""
+        return {'_fields': self._fields,
+                '_experiment_id': self._experiment_id,
+                '_current_state': self._current_state}
+
+    def __setstate__(self, state):
+        """Restores the experiment from a pickled state"""
+        for attr, value in state.items():
+            super(Experiment, self).__setattr__(attr, value)
+        fields = self._fields
+        #Experiments saved before the output line processor schema and
+        #block size existed
+        fields.setdefault('output_line_processor_schema', None)
+        fields.setdefault('output_line_processor_block_size', None)
+        #Experiments saved before the states were split into two lists
+        if 'states_info' in fields:
+            states_info = fields.pop('states_info')
+            fields['state_names'] = [name for name, _ in states_info]
+            fields['state_times'] = [stamp for _, stamp in states_info]
+            super(Experiment, self).__setattr__('_current_state',
+                                                states_info[-1][0])
+        #Unpickled strings aren't interned
+        super(Experiment, self).__setattr__('_current_state',
+                                            intern(self._current_state))
+        self._reset_caches()
+
+    @property
+    def id(self):
+        """str: The unique identifier of the experiment"""
+        return self._experiment_id
+
+    @property
+    def state(self):
+        """str: The current state of the experiment"""
+        return self._current_state
+
+    @property
+    def state_info(self):
+        """tuple: The current state of the experiment and its timestamp"""
+        return (self._current_state, self._fields['state_times'][-1])
+
+    @property
+    def states_info(self):
+        """list of tuples: The states of the experiment with timestamps"""
+        return list(zip(self._fields['state_names'],
+                        self._fields['state_times']))
+
+    def _parameters_string(self):
+        """Returns the parameters formatted with the parameters format
+
+        The string is cached until the parameters or their format is assigned.
+        """
+        if self._parameters_cache is None:
+            fields = self._fields
+            parameters_string = fields['parameters_format'].format(
+                                                    **fields['parameters'])
+            super(Experiment, self).__setattr__('_parameters_cache',
+                                                parameters_string)
+        return self._parameters_cache
+
     @property 
     def callstring(self):
-        rcmd = self._fields['run_command_prefix']
-        code_file = self._fields['main_code_file']
-        parameters = self._fields['parameters']
-        param_format = self._fields['parameters_format']
-        parameters_string = param_format.format(**parameters)
+        """str: The command that runs the experiment, cached until one of
+        its fields is assigned"""
+        if self._callstring_cache is not None:
+            return self._callstring_cache
+        fields = self._fields
+        rcmd = fields['run_command_prefix']
+        code_file = fields['main_code_file']
+        parameters_string = self._parameters_string()
         callstring = ' '.join([rcmd, code_file, parameters_string])
+        super(Experiment, self).__setattr__('_callstring_cache', callstring)
         return callstring
 
     def update_state(self, state):
         """ Updates the state
         """
-        if state == self.state: return
-        if state == 'running' and self._fields['conditions']:
-            for c in self._fields['conditions']:
-                self._fields['conditions'][c].start_time = datetime.datetime.now()
-        self._fields['states_info'].append((state, datetime.datetime.now()))
+        fields = self._fields
+        state = intern(state)
+        if state is self._current_state: return
+        if state is State.running and fields['conditions']:
+            for c in fields['conditions']:
+                fields['conditions'][c].start_time = datetime.datetime.now()
+        fields['state_names'].append(state)
+        fields['state_times'].append(datetime.datetime.now())
+        super(Experiment, self).__setattr__('_current_state', state)
 
         
     def as_gen(self):
         """Yields info about the experiment
         Yields:
-            str: A line of experiment status
+            str: The experiment status
         """
-        yield "%s\n" % self._experiment_id
-        yield "  Run command: %s\n" % self._fields['run_command_prefix']
-        yield "  Main code file: %s\n" % self._fields['main_code_file']
-        params = self._fields['parameters_format'].format( \
-            **self._fields['parameters'])
-        yield "  Parameters: %s\n" % params
-        yield "  Parameters format: %s\n" % self._fields['parameters_format']
-        if self._fields['collection']:
-            yield "  Collection: %s\n" % self._fields['collection']
-        yield "  State: %s\n" % self.state
-        if self._fields['node_id']:
-            yield "  Node: " + self._fields['node_id'] + '\n'
-        if self.state in (Experiment.State.running, Experiment.State.finished):
-            can_process = False
-            for output_file in self._fields['outputs']:
-                if self._fields['output_line_processor']:
-                    if output_file in self._fields['output_line_processor']:
-                        can_process = True
-                if self._fields['output_file_processor']:
-                    if output_file in self._fields['output_file_processor']:
-                        can_process = True
-            if can_process:
-                yield "  Output:\n"
-                for output_file in self._fields['outputs']:
+        fields = self._fields
+        parts = ["%s\n" % self._experiment_id,
+                "  Run command: %s\n" % fields['run_command_prefix'],
+                "  Main code file: %s\n" % fields['main_code_file']]
+        parts.append("  Parameters: %s\n" % self._parameters_string())
+        parts.append("  Parameters format: %s\n" % \
+                        fields['parameters_format'])
+        if fields['collection']:
+            parts.append("  Collection: %s\n" % fields['collection'])
+        parts.append("  State: %s\n" % self.state)
+        if fields['node_id']:
+            parts.append("  Node: " + fields['node_id'] + '\n')
+        state = self._current_state
+        if state is State.running or state is State.finished:
+            processable = self._processable_outputs()
+            if processable:
+                parts.append("  Output:\n")
+                for output_file in processable:
                     try:
                         output = self.get_output(output_file)
-                        yield "    " + output_file + ":\n"
+                        parts.append("    " + output_file + ":\n")
                         for field in output:
-                            yield "      %s: " % field + str(output[field]) + "\n"
+                            parts.append("      %s: " % field + \
+                                            str(output[field]) + "\n")
                     except OutputReadError as e:
                         pass
-        yield "  Last modified: %s\n" % self._fields['time_modified']
-        if self._fields['conditions']:            
-            conds = '  Conditions:\n'
-            for condition in self._fields['conditions']:
-                conds +=  '    ' + self._fields['conditions'][condition].name + ':\n'
-                conds +=  '      variablename: ' + self._fields['conditions'][condition].varname + '\n'
-                conds +=  '      killvalue: ' + str(self._fields['conditions'][condition].killvalue) + '\n'
-                conds +=  '      comparator: ' + self._fields['conditions'][condition].comparator + '\n'
-                conds +=  '      when: ' + self._fields['conditions'][condition].when + '\n'
-                conds +=  '      action: ' + self._fields['conditions'][condition].action + '\n'
-            yield conds
-        if self._fields['warnings']:
-            warns = '  Warnings:\n'
-            for warn in self._fields['warnings']:
-                warns += '    ' + warn + '\n'
-            yield warns
+        parts.append("  Last modified: %s\n" % fields['time_modified'])
+        if fields['conditions']:            
+            parts.append('  Conditions:\n')
+            for condition in fields['conditions'].values():
+                parts.append(_CONDITION_FORMAT % (condition.name,
+                                condition.varname, condition.killvalue,
+                                condition.comparator, condition.when,
+                                condition.action))
+        if fields['warnings']:
+            parts.append('  Warnings:\n')
+            parts.extend(['    %s\n' % warn for warn in fields['warnings']])
         out_file = os.path.join(self.get_results_dir(), 'stdout.log')
         err_file = os.path.join(self.get_results_dir(), 'stderr.log')
-        yield '  Logs:\n'
+        parts.append('  Logs:\n')
         for log_file in (out_file, err_file,):
             if os.path.exists(log_file):
-                yield '    Path: %s\n' % (log_file)
+                parts.append('    Path: %s\n' % (log_file))
                 lines = []
                 with open(log_file, 'r') as f:
                     lines = f.readlines()
                 nlines = len(lines)
-                yield '    Specs: tmod: %s; linecount: %d; size: %d;\n' % (time.strftime(
+                parts.append('    Specs: tmod: %s; linecount: %d; size: %d;\n' % (time.strftime(
                     '%F %T', time.localtime(os.path.getmtime(log_file))),
-                    nlines, os.path.getsize(log_file))
+                    nlines, os.path.getsize(log_file)))
                 if lines:
-                    yield '    Tail:\n'
+                    parts.append('    Tail:\n')
                     for i in range(max(0, nlines-10), nlines):
-                        yield '      L%04d: %s\n' % (i+1, lines[i].rstrip())
+                        parts.append('      L%04d: %s\n' % (i+1, lines[i].rstrip()))
+        yield ''.join(parts)
 
     def __str__(self):
-        return "%s %s" % (self._experiment_id, self._fields['state'][-1][0])
+        return "%s %s" % (self._experiment_id, self._current_state)
+
+State = Experiment.State
+"""Class: Shorthand for the experiment states"""
 
 def duplicate_experiment(experiment, experiment_id):
-    definable_fields = MANDATORY_FIELDS | OPTIONAL_FIELDS
-    experiment_data = {}
-    for field in definable_fields:
-        experiment_data[field] = experiment._fields[field]
-    experiment_data['experiment_id'] = experiment_id
-    experiment_data['path'] = experiment._fields['path']
-    return Experiment(**experiment_data)
+    return experiment._clone_with_id(experiment_id)
 
 class ExperimentWarning:
 
@@ -416,32 +759,69 @@ class ExperimentWarning:
         self.when = when.strip()
         self.action = action.strip()
         self.start_time = datetime.datetime.now()
+        self._derive_attributes()
+
+    def _derive_attributes(self):
+        """Precomputes the attributes derived from the warning fields"""
+        #Unknown comparators never trigger the action
+        self._cmp = _COMPARATORS.get(self.comparator)
+        self._varlen = len(self.varname)
+        #The condition is checked only after the given minutes have passed
+        self._has_time_gate = 'time' in self.when
+        if self._has_time_gate:
+            self._time_threshold_sec = float(self.when[4:].strip()) * 60
+
+    def __getstate__(self):
+        """Returns the pickled state of the warning without derived fields"""
+        return dict((attr, value) for attr, value in self.__dict__.items()
+                    if attr not in ('_cmp', '_varlen', '_has_time_gate',
+                                    '_time_threshold_sec'))
+
+    def __setstate__(self, state):
+        """Restores the warning and recomputes its derived fields"""
+        self.__dict__.update(state)
+        self._derive_attributes()
             
     def get_action(self, logrow):
-        logrow = logrow.strip()
-        varlen = len(self.varname)
-        check_condition = True
-        if 'time' in self.when:
-            time_when = float(self.when[4:].strip())
-            time_passed = datetime.datetime.now() - self.start_time
-            time_passed_sec = time_passed.days * 86400 + time_passed.seconds
-            time_passed_min = time_passed_sec / 60
-            if time_passed_min < time_when:
-                check_condition = False
-        if check_condition and logrow[:varlen].strip() == self.varname:
-            varvalue = logrow[varlen:].strip()
-            try:
-                varvalue = float(varvalue)
-            except:
+        if self._has_time_gate:
+            elapsed = datetime.datetime.now() - self.start_time
+            if elapsed.total_seconds() < self._time_threshold_sec:
                 return 'no action'
-            if any( [self.comparator == 'gt' and varvalue > self.killvalue,
-                self.comparator == 'lt' and varvalue < self.killvalue,
-                self.comparator == 'eq' and varvalue == self.killvalue,
-                self.comparator == 'geq' and varvalue >= self.killvalue,
-                self.comparator == 'leq' and varvalue <= self.killvalue] ):
-                return self.action
+        #lstrip returns the row itself when it has no leading whitespace
+        logrow = logrow.lstrip()
+        if not logrow.startswith(self.varname):
+            return 'no action'
+        try:
+            #float ignores the whitespace around the value
+            varvalue = float(logrow[self._varlen:])
+        except ValueError:
+            return 'no action'
+        if self._cmp and self._cmp(varvalue, self.killvalue):
+            return self.action
         return 'no action'
 
+    def get_actions_batch(self, values):
+        """Checks many values of the followed variable at once
+
+        Parameters:
+            values (sequence of float): Values of the variable in log order
+
+        Returns:
+            list: 1 for each value that triggers the action and 0 for the
+            others. The values are compared with numpy when it is available.
+        """
+        gate_closed = False
+        if self._has_time_gate:
+            elapsed = datetime.datetime.now() - self.start_time
+            gate_closed = elapsed.total_seconds() < self._time_threshold_sec
+        if gate_closed or not self._cmp:
+            return [0] * len(values)
+        if numpy is None:
+            return [int(self._cmp(value, self.killvalue)) for value in values]
+        values = numpy.asarray(values, dtype=float)
+        #The operator functions compare whole numpy arrays elementwise
+        return self._cmp(values, self.killvalue).astype(int).tolist()
+
     def __eq__(self, other):
         if not other:
             return False
@@ -205,14 +205,13 @@ class Nerogui(QtGui.QMainWindow, design.Ui_MainWindow):
             item = MyTableWidgetItem(
 	           QtCore.QString("%1").arg(name))
             item.setFlags(item.flags() & ~QtCore.Qt.ItemIsEditable)
-            status = self.nero.database[
-	                name]._fields["states_info"][-1][0] #latest status
+            status = self.nero.database[name].state #latest status
             item.setTextColor(color_coding[status])
             self.paramTable.setItem(yAxis, 0, item)
             submitted = ""
             try:
                 submitted = str(self.nero.database[
-	                name]._fields["states_info"][1][1])
+	                name]._fields["state_times"][1])
             except IndexError:
                 pass
             item = MyTableWidgetItem(QtCore.QString("%1").arg(submitted))
@@ -304,7 +303,11 @@ class Nerogui(QtGui.QMainWindow, design.Ui_MainWindow):
                 self.add_to_param_table()
                 return
             newParam = str(self.paramTable.item(y, x).text())
-            self.nero.database[name]._fields["parameters"][param] = newParam
+            #Duplicates share the parameters dict, so edit a copy and assign
+            #it back to drop the cached callstring of this experiment only
+            parameters = dict(self.nero.database[name].parameters)
+            parameters[param] = newParam
+            self.nero.database[name].parameters = parameters
             self.nero.replace_experiment(self.nero.database[name])
             self.add_to_param_table()
 
@@ -0,0 +1,13 @@
+def line_reader(line, names, sep=', '):
+    keys = names.split()
+    return dict(zip(keys, [float(v) for v in line.strip().split(sep)]))
+def bad_reader(line):
+    return [1]
+def file_reader(f, names, sep=', '):
+    out = {}
+    for line in f.read().strip().split('\n'):
+        for k, v in zip(names.split(), line.split(sep)):
+            out.setdefault(k, []).append(float(v))
+    return out
+def plot(filename, feedback, save_image, y, x=None):
+    return (filename, y, x)
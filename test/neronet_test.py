@@ -1,9 +1,52 @@
 import unittest
+import os
+import shutil
+import tempfile
 from neronet.node import Node
-from neronet.experiment import Experiment, ExperimentWarning
+from neronet.experiment import Experiment, ExperimentWarning, \
+                                duplicate_experiment, OutputReadError, \
+                                _iter_lines
+import neronet.experiment
+from neronet.config_parser import ConfigParser, FormatError
+
+def read_line(line):
+    loss, acc = line.split(', ')
+    return {'loss': float(loss), 'acc': float(acc)}
+
+def read_line_reversed(line):
+    acc, loss = line.split(', ')
+    return {'loss': float(loss), 'acc': float(acc)}
 
 class Neronet_test(unittest.TestCase):
     
+    def _processor_spec(self, function):
+        """Caches the function as an output processor and returns its spec"""
+        spec = 'neronet_test ' + function.__name__
+        neronet.experiment._PROCESSOR_CACHE[spec] = \
+                                    (function.__name__, function, ())
+        self.addCleanup(neronet.experiment._PROCESSOR_CACHE.pop, spec, None)
+        return spec
+    
+    def _finished_experiment(self, **fields):
+        """Creates a finished experiment whose results are in a temp folder
+        and whose output processors are the given functions"""
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        for processor_type in ('output_line_processor',
+                                'output_file_processor'):
+            if fields.get(processor_type):
+                fields[processor_type] = dict((output_file,
+                        self._processor_spec(function)) for output_file, \
+                        function in fields[processor_type].items())
+        e = Experiment("exp1", "python", "run.py", folder, **fields)
+        e.run_results.append(folder)
+        e.update_state(Experiment.State.finished)
+        return e
+    
+    def _write_output(self, e, filename, content):
+        with open(os.path.join(e.get_results_dir(), filename), 'w') as f:
+            f.write(content)
+    
     def test_experiment_warning(self):
         
         w = ExperimentWarning("name", "var1", 50.0, "gt", "immediately", "kill")
@@ -44,6 +87,31 @@ class Neronet_test(unittest.TestCase):
         self.assertEqual(w.get_action("variable 51"), "email")
         self.assertEqual(w.get_action("var1 51"), "no action")
     
+    def test_experiment_warning_batch(self):
+        
+        w = ExperimentWarning("name", "var1", 50.0, "gt", "immediately", "kill")
+        self.assertEqual(w.get_actions_batch([49, 50, 51]), [0, 0, 1])
+        self.assertEqual(w.get_actions_batch([]), [])
+        
+        w = ExperimentWarning("name", "var1", 50.0, "leq", "immediately", "warn")
+        self.assertEqual(w.get_actions_batch([49, 50, 51]), [1, 1, 0])
+        
+        w = ExperimentWarning("name", "var2", 50, "geq", "time 6000", "email")
+        self.assertEqual(w.get_actions_batch([49, 50, 51]), [0, 0, 0])
+    
+    def test_experiment_warning_old_state(self):
+        
+        w = ExperimentWarning("name", "var1", 50.0, "gt", "time 0", "kill")
+        state = w.__getstate__()
+        self.assertNotIn('_cmp', state)
+        #Warnings pickled before the derived fields existed
+        old = ExperimentWarning("", "", 0, "", "", "")
+        old.__dict__.clear()
+        old.__setstate__(state)
+        self.assertEqual(old.get_action("var1 51"), "kill")
+        self.assertEqual(old.get_action("var1 49"), "no action")
+        self.assertEqual(old, w)
+    
     def test_node_str(self):
         
         c = Node("triton","slurm", "triton.aalto.fi")
@@ -63,6 +131,54 @@ class Neronet_test(unittest.TestCase):
         self.assertEqual(e.get_action("var1 60"), ("kill", "name"))
         self.assertEqual(e.get_action("var1 49.9999"), ("no action", ""))
         
+    def test_experiment_get_action_multiple_conditions(self):
+        
+        c = {'kill' : ExperimentWarning("kill", "var1", 50.0, "gt", "immediately", "kill"),
+             'warn' : ExperimentWarning("warn", "var1", 40.0, "gt", "immediately", "warn"),
+             'other' : ExperimentWarning("other", "var2", 0.0, "lt", "immediately", "warn")}
+        e = Experiment("exp1", "python", "run.py", "some_folder",
+                    parameters={'param1': 20}, parameters_format="{param1}",
+                    conditions=c)
+        
+        self.assertEqual(e.get_action("var1 60"), ("kill", "kill"))
+        self.assertEqual(e.get_action("var1 45"), ("warn", "warn"))
+        self.assertEqual(e.get_action("var2 -1"), ("warn", "other"))
+        self.assertEqual(e.get_action("var3 -1"), ("no action", ""))
+        self.assertEqual(e.get_action(""), ("no action", ""))
+        
+        e.conditions = {}
+        self.assertEqual(e.get_action("var1 60"), ("no action", ""))
+        
+    def test_experiment_get_action_variable_with_whitespace(self):
+        
+        c = {'k' : ExperimentWarning("k", "train loss", 4.0, "gt", "immediately", "kill"),
+             'w' : ExperimentWarning("w", "train", 4.0, "gt", "immediately", "warn")}
+        e = Experiment("exp1", "python", "run.py", "some_folder", conditions=c)
+        
+        self.assertEqual(e.get_action("train loss 5"), ("kill", "k"))
+        self.assertEqual(e.get_action("train loss 3"), ("no action", ""))
+        self.assertEqual(e.get_action("train 5"), ("warn", "w"))
+        self.assertEqual(e.get_action("loss 5"), ("no action", ""))
+        
+    def test_duplicate_experiment(self):
+        
+        e = Experiment("exp1", "python", "run.py", "some_folder",
+                    parameters={'param1': 20}, parameters_format="{param1}")
+        e.update_state(Experiment.State.submitted)
+        e.set_warning("name")
+        
+        d = duplicate_experiment(e, "exp2")
+        self.assertEqual(d.id, "exp2")
+        self.assertEqual(e.id, "exp1")
+        self.assertEqual(d.state, Experiment.State.defined)
+        self.assertEqual(len(d.states_info), 1)
+        self.assertEqual(d.get_warnings(), [])
+        self.assertEqual(d.callstring, e.callstring)
+        self.assertEqual(d.path, e.path)
+        
+        d.update_state(Experiment.State.submitted)
+        self.assertEqual(len(e.states_info), 2)
+        
     def test_experiment_callstring(self):
     
         c = {'name' : ExperimentWarning("name", "var1", 50.0, "gt", "immediately", "kill")}
@@ -71,6 +187,21 @@ class Neronet_test(unittest.TestCase):
                     
         self.assertEqual(e.callstring, "python run.py 20 30")
     
+    def test_experiment_callstring_cache(self):
+        
+        e = Experiment("exp1", "python", "run.py", "some_folder",
+                    parameters={'a': 2}, parameters_format="{a}")
+        self.assertEqual(e.callstring, "python run.py 2")
+        
+        e.parameters = {'a': 3}
+        self.assertEqual(e.callstring, "python run.py 3")
+        e.parameters_format = "--a {a}"
+        self.assertEqual(e.callstring, "python run.py --a 3")
+        e.run_command_prefix = "python3"
+        self.assertEqual(e.callstring, "python3 run.py --a 3")
+        e.main_code_file = "main.py"
+        self.assertEqual(e.callstring, "python3 main.py --a 3")
+    
     def test_experiment_set_warning(self):
         
         c = {'name' : ExperimentWarning("name", "var1", 50.0, "gt", "immediately", "kill")}
@@ -91,9 +222,179 @@ class Neronet_test(unittest.TestCase):
         e = Experiment("exp1", "python", "run.py",
                     {'param1': 20, 'param2' : 30}, "{param1} {param2}", "", conditions=c)
         
-        self.assertEqual(len(e._fields['states_info']), 1)
+        self.assertEqual(len(e.states_info), 1)
         e.update_state(Experiment.State.submitted)
-        self.assertEqual(len(e._fields['states_info']), 2)
+        self.assertEqual(len(e.states_info), 2)
+
+    def test_experiment_old_states_info(self):
+
+        e = Experiment("exp1", "python", "run.py", "some_folder")
+        fields = dict(e._fields)
+        stamps = fields.pop('state_times')
+        states_info = [(Experiment.State.defined, stamps[0]),
+                       ('running', stamps[0])]
+        fields['states_info'] = states_info
+        del fields['state_names']
+        old = Experiment.__new__(Experiment)
+        old.__setstate__({'_fields': fields, '_experiment_id': "exp1"})
+        self.assertIs(old.state, Experiment.State.running)
+        self.assertEqual(old.states_info, states_info)
+        self.assertNotIn('states_info', old._fields)
+        old.update_state(Experiment.State.finished)
+        self.assertEqual(len(old.states_info), 3)
+
+    def test_experiment_str(self):
+        
+        e = Experiment("exp1", "python", "run.py", "some_folder")
+        self.assertEqual(str(e), "exp1 defined")
+        e.update_state(Experiment.State.submitted)
+        self.assertEqual(str(e), "exp1 submitted")
+
+    @unittest.skipIf(neronet.experiment.numpy is None, "numpy not installed")
+    def test_experiment_read_output_columns(self):
+        
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        e = Experiment("exp1", "python", "run.py", folder,
+                    output_line_processor_schema={
+                        'sep.log': '"loss acc" ", "',
+                        'ws.log': '"loss acc"'})
+        
+        def read(filename, content):
+            path = os.path.join(folder, filename)
+            with open(path, 'w') as f:
+                f.write(content)
+            with open(path, 'r') as f:
+                return e._read_output_columns(f, filename)
+        
+        data = read('sep.log', "1.5, 2\n3, 4.25\n")
+        self.assertEqual(sorted(data), ['acc', 'loss'])
+        self.assertEqual(list(data['loss']), [1.5, 3.0])
+        self.assertEqual(list(data['acc']), [2.0, 4.25])
+        
+        data = read('ws.log', "1 2\n  3\t4\n")
+        self.assertEqual(list(data['loss']), [1.0, 3.0])
+        self.assertEqual(list(data['acc']), [2.0, 4.0])
+        
+        self.assertRaises(OutputReadError, read, 'sep.log', "1, 2\n3\n")
+        self.assertRaises(OutputReadError, read, 'ws.log', "1 2\n3 x\n")
+    
+    def test_config_output_line_processor_schema(self):
+        
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        open(os.path.join(folder, 'run.py'), 'w').close()
+        data = {'run_command_prefix': 'python', 'main_code_file': 'run.py',
+                'outputs': ['out.log'], '+exp1': None}
+        
+        data['output_line_processor_schema'] = {'out.log': '"loss acc"'}
+        with self.assertRaises(FormatError) as cm:
+            ConfigParser().parse_experiment_data(folder, dict(data))
+        self.assertEqual(cm.exception.error_msgs, ["exp1: no output line "
+                "processor defined for output line processor schema of "
+                "out.log"])
+        
+        data['output_line_processor_schema'] = '"loss acc"'
+        with self.assertRaises(FormatError) as cm:
+            ConfigParser().parse_experiment_data(folder, dict(data))
+        self.assertEqual(cm.exception.error_msgs, ["exp1: "
+                "output_line_processor_schema should be a dict"])
+        
+        #YAML drops the quotes of 'loss acc', and lists aren't schemas
+        for schema in ('loss acc', ['loss', 'acc'], '"loss acc" ", " "x"'):
+            data['output_line_processor_schema'] = {'out.log': schema}
+            with self.assertRaises(FormatError) as cm:
+                ConfigParser().parse_experiment_data(folder, dict(data))
+            self.assertIn("exp1: could not parse column names and separator "
+                    "from output line processor schema of out.log",
+                    cm.exception.error_msgs)
+    
+    @unittest.skipIf(neronet.experiment.numpy is None, "numpy not installed")
+    def test_experiment_get_output_schema(self):
+        
+        e = self._finished_experiment(outputs=['out.log'],
+                    output_line_processor={'out.log': read_line},
+                    output_line_processor_schema={'out.log': '"loss acc" ", "'})
+        self._write_output(e, 'out.log', "1.5, 2\n3, 4.25\n")
+        data = e.get_output('out.log')
+        self.assertIsInstance(data['loss'], neronet.experiment.numpy.ndarray)
+        self.assertEqual(list(data['loss']), [1.5, 3.0])
+        self.assertEqual(list(data['acc']), [2.0, 4.25])
+        
+        self._write_output(e, 'out.log', "1.5, 2\n3\n")
+        self.assertRaises(OutputReadError, e.get_output, 'out.log')
+
+    def test_experiment_get_output_cache(self):
+        
+        e = self._finished_experiment(outputs=['out.log'],
+                    output_line_processor={'out.log': read_line})
+        self._write_output(e, 'out.log', "1, 2\n")
+        self.assertEqual(e.get_output('out.log'), {'loss': [1.0], 'acc': [2.0]})
+        self.assertIs(e.get_output('out.log'), e.get_output('out.log'))
+        
+        self._write_output(e, 'out.log', "1, 2\n3, 4\n")
+        self.assertEqual(e.get_output('out.log'),
+                        {'loss': [1.0, 3.0], 'acc': [2.0, 4.0]})
+        
+        e.output_line_processor = \
+                        {'out.log': self._processor_spec(read_line_reversed)}
+        self.assertEqual(e.get_output('out.log'),
+                        {'loss': [2.0, 4.0], 'acc': [1.0, 3.0]})
+    
+    def test_experiment_processable_outputs(self):
+        
+        e = Experiment("exp1", "python", "run.py", "some_folder",
+                    outputs=['c.log', 'a.log', 'stdout.log', 'b.log'],
+                    output_line_processor={'b.log': 'm f', 'c.log': 'm f'},
+                    output_file_processor={'a.log': 'm g'})
+        self.assertEqual(e._processable_outputs(), ('c.log', 'a.log', 'b.log'))
+        
+        e.outputs = ['b.log', 'stdout.log', 'a.log']
+        self.assertEqual(e._processable_outputs(), ('b.log', 'a.log'))
+        e.output_file_processor = {'stdout.log': 'm g'}
+        self.assertEqual(e._processable_outputs(), ('b.log', 'stdout.log'))
+        e.output_line_processor = None
+        self.assertEqual(e._processable_outputs(), ('stdout.log',))
+    
+    def test_iter_lines(self):
+        
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        path = os.path.join(folder, 'out.log')
+        with open(path, 'w') as f:
+            f.write("loss 1\n\nloss 22\nacc 3")
+        with open(path, 'r') as f:
+            expected = list(f)
+        self.assertEqual(expected[-1], "acc 3")
+        for block_size in (1, 3, 100):
+            with open(path, 'r') as f:
+                self.assertEqual(list(_iter_lines(f, block_size)), expected)
+    
+    def test_config_output_line_processor_block_size(self):
+        
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        open(os.path.join(folder, 'run.py'), 'w').close()
+        data = {'run_command_prefix': 'python', 'main_code_file': 'run.py',
+                'parameters': {'x': 1}, 'parameters_format': '{x}',
+                '+exp1': None}
+        
+        for block_size in (0, -1):
+            data['output_line_processor_block_size'] = block_size
+            with self.assertRaises(FormatError) as cm:
+                ConfigParser().parse_experiment_data(folder, dict(data))
+            self.assertEqual(cm.exception.error_msgs, ["exp1: output line "
+                    "processor block size should be positive"])
+        
+        data['output_line_processor_block_size'] = True
+        with self.assertRaises(FormatError) as cm:
+            ConfigParser().parse_experiment_data(folder, dict(data))
+        self.assertEqual(cm.exception.error_msgs, ["exp1: "
+                "output_line_processor_block_size should be a int"])
+        
+        data['output_line_processor_block_size'] = 4096
+        experiments = ConfigParser().parse_experiment_data(folder, dict(data))
+        self.assertEqual(experiments[0].output_line_processor_block_size, 4096)
 
 if __name__ == '__main__':
     unittest.main()